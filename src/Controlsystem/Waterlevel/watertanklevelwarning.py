@@ -15,13 +15,18 @@
 # Gemaakt voor MicroPython (bv. op RP2040, XIAO RP2350).
 # ------------------------------------------------------------
 
-from machine import UART, Pin
+from machine import UART, Pin, Timer, idle
 import utime
-from collections import deque
+import micropython
+from array import array
 import ujson
+import os
 from ubluetooth import BLE, UUID, FLAG_READ, FLAG_NOTIFY
 import struct
 
+# Reserveer geheugen voor foutmeldingen uit IRQ-/timer-callbacks
+micropython.alloc_emergency_exception_buf(100)
+
 # -------- CONFIGURATIE UIT FLASH (config.json) -----------
 def load_config(filename="config.json"):
     """
@@ -31,7 +36,7 @@ def load_config(filename="config.json"):
     defaults = {
         "TANK_HEIGHT_MM": 196,           # Hoogte tank in mm
         "SENSOR_TO_WATER_MIN_MM": 30,    # Sensor dode zone in mm
-        "MOVING_AVG_N": 10,              # Filtervenster voor metingen
+        "MOVING_AVG_N": 16,              # Filtervenster (macht van 2, anders naar boven afgerond)
         "CRITICAL_LEVEL_ON_MM": 150,     # Drempel laag water (ingang)
         "CRITICAL_LEVEL_OFF_MM": 180,    # Drempel laag water (uitgang)
         "BOTTOM_LEVEL_ON_MM": 50,        # Drempel bijna leeg (ingang)
@@ -41,6 +46,9 @@ def load_config(filename="config.json"):
         "SLOW_BLINK_MS": 700,            # LED-blinktijd laag water
         "FAST_BLINK_MS": 200,            # LED-blinktijd bijna leeg
         "MEASURE_INTERVAL_MS": 1000,      # Interval tussen metingen (ms)
+        "CONFIG_CHECK_INTERVAL_MS": 5000, # Min. interval config.json checken (ms)
+        "CONFIG_CHECK_MAX_INTERVAL_MS": 300000, # Max. interval na backoff (ms)
+        "LOG_VERBOSE": True,             # Log elke meting van het waterniveau
         "BLUETOOTH_ENABLED": False         # Nieuw: schakel BLE functionaliteit aan/uit
     }
     try:
@@ -55,24 +63,29 @@ def load_config(filename="config.json"):
         print("FOUT BIJ LADEN CONFIG, defaults worden gebruikt!", e)
         return defaults
 
-def file_md5(filename):
+def file_signature(filename):
     """
-    Bereken MD5-hash van bestand. Gebruikt om wijzigingen aan config.json
-    te detecteren zonder inhoud telkens volledig te hoeven vergelijken.
+    Bepaal een signatuur (grootte, wijzigingstijd) van een bestand via os.stat.
+    Gebruikt om wijzigingen aan config.json te detecteren zonder het bestand
+    telkens te hoeven lezen.
     """
     try:
-        with open(filename, 'rb') as f:
-            import uhashlib
-            m = uhashlib.md5()
-            while True:
-                data = f.read(128)
-                if not data:
-                    break
-                m.update(data)
-            return m.digest()
+        st = os.stat(filename)
+        return (st[6], st[8])
     except Exception as e:
         return None
 
+def next_pow2(n):
+    """
+    Rond n naar boven af op de eerstvolgende macht van 2 (minimaal 1).
+    Zo kan de ringbuffer-index met een bitmasker i.p.v. modulo rondlopen;
+    de RP2040 (Cortex-M0+) heeft geen hardware-deling.
+    """
+    p = 1
+    while p < n:
+        p <<= 1
+    return p
+
 # ------ INITIEEL INLADEN VAN CONFIG EN HARDWAREPINNEN ------
 CONFIG_FILE = "config.json"
 cfg = load_config(CONFIG_FILE)
@@ -84,6 +97,8 @@ SENSOR_UART_TX = 0
 SENSOR_UART_RX = 1
 SENSOR_BAUDRATE = 9600
 TRIGGER_CMD = b'\x55'  # Commandobyte voor A02YY sensor
+SENSOR_TIMEOUT_MS = 300        # Wachttijd op antwoord bij een werkende sensor
+SENSOR_TIMEOUT_MIN_MS = 150    # Kortere wachttijd na herhaalde timeouts (A02YY antwoordt binnen ~100 ms)
 
 OUTPUT_UART_NUM = 1
 OUTPUT_UART_TX = 4
@@ -92,7 +107,8 @@ OUTPUT_BAUDRATE = 115200
 
 LED_PIN   = cfg["LED_PIN"]
 RELAY_PIN = cfg["RELAY_PIN"]
-MOVING_AVG_N = cfg["MOVING_AVG_N"]  # Lengte van filtervenster (alleen bij start)
+MOVING_AVG_N = next_pow2(cfg["MOVING_AVG_N"])  # Lengte van filtervenster (alleen bij start)
+_N_MASK = MOVING_AVG_N - 1
 
 # --------- PARAMETERS DIE TIJDENS RUN-TIME AANPASBAAR ZIJN ---------
 RUNTIME_KEYS = [
@@ -104,30 +120,89 @@ RUNTIME_KEYS = [
     "BOTTOM_LEVEL_OFF_MM",
     "SLOW_BLINK_MS",
     "FAST_BLINK_MS",
-    "MEASURE_INTERVAL_MS"
+    "MEASURE_INTERVAL_MS",
+    "CONFIG_CHECK_INTERVAL_MS",
+    "CONFIG_CHECK_MAX_INTERVAL_MS",
+    "LOG_VERBOSE"
 ]
 # runtime_cfg bevat de actuele, toepasbare instellingen voor alarmgrenzen en blinktijden
 runtime_cfg = {k: cfg[k] for k in RUNTIME_KEYS}
 
+def build_thresholds():
+    """
+    Bouw een tuple met de vaak gebruikte drempels en tijden uit runtime_cfg.
+    Zo hoeft de hoofdlus niet elke iteratie dict-lookups te doen; de tuple
+    wordt alleen opnieuw opgebouwd als de configuratie wijzigt.
+    Volgorde: (slow_blink, fast_blink, crit_on, crit_off, bot_on, bot_off, measure_ms)
+    """
+    return (
+        runtime_cfg["SLOW_BLINK_MS"],
+        runtime_cfg["FAST_BLINK_MS"],
+        runtime_cfg["CRITICAL_LEVEL_ON_MM"],
+        runtime_cfg["CRITICAL_LEVEL_OFF_MM"],
+        runtime_cfg["BOTTOM_LEVEL_ON_MM"],
+        runtime_cfg["BOTTOM_LEVEL_OFF_MM"],
+        runtime_cfg["MEASURE_INTERVAL_MS"],
+    )
+
+_thr = build_thresholds()
+
 def update_runtime_cfg(new_cfg):
     """
     Werk runtime-configuratie bij met nieuwe waardes uit config.json.
     Retourneert een lijst van parameters die daadwerkelijk zijn gewijzigd.
     """
-    global runtime_cfg
+    global runtime_cfg, _thr
     changes = []
     for k in RUNTIME_KEYS:
         if k in new_cfg and new_cfg[k] != runtime_cfg[k]:
             runtime_cfg[k] = new_cfg[k]
             changes.append(k)
+    if changes:
+        _thr = build_thresholds()
     return changes
 
 # ------------ HARDWARE INITIALISATIE ------------
-sensor_uart = UART(SENSOR_UART_NUM, baudrate=SENSOR_BAUDRATE, tx=SENSOR_UART_TX, rx=SENSOR_UART_RX)
-pc_uart = UART(OUTPUT_UART_NUM, baudrate=OUTPUT_BAUDRATE, tx=OUTPUT_UART_TX, rx=OUTPUT_UART_RX)
-led = Pin(LED_PIN, Pin.OUT)         # Status-LED (rood of oranje)
-relais = Pin(RELAY_PIN, Pin.OUT)    # Relais voor bijv. pompschakeling
-samples = deque([], maxlen=MOVING_AVG_N)  # Buffer voor meetwaarden (moving average)
+# De hardware wordt pas in main() (via _init_hardware) geclaimd, zodat de module
+# ook geïmporteerd kan worden (bv. in de REPL of voor profiling) zonder te starten.
+sensor_uart = None
+pc_uart = None
+led = None                          # Status-LED (rood of oranje)
+relais = None                       # Relais voor bijv. pompschakeling
+_led_hw = None                      # Laatst naar de LED geschreven waarde (None = onbekend)
+
+# Ontvangstbuffer voor één sensorframe; wordt gevuld vanuit de UART-IRQ
+_rx_buf = bytearray(4)
+_rx_ready = False
+
+def _on_rx(uart):
+    """
+    UART-IRQ (RX idle): lees het ontvangen sensorframe in de vooraf
+    gealloceerde buffer en meld via _rx_ready dat er data klaarstaat.
+    """
+    global _rx_ready
+    if uart.readinto(_rx_buf) == 4:
+        _rx_ready = True
+
+def _init_hardware():
+    """
+    Initialiseer UARTs, pinnen, sensor-IRQ en blinktimer.
+    Retourneert (sensor_uart, pc_uart, led, relais).
+    """
+    global sensor_uart, pc_uart, led, relais, blink_tmr
+    sensor_uart = UART(SENSOR_UART_NUM, baudrate=SENSOR_BAUDRATE, tx=SENSOR_UART_TX, rx=SENSOR_UART_RX)
+    pc_uart = UART(OUTPUT_UART_NUM, baudrate=OUTPUT_BAUDRATE, tx=OUTPUT_UART_TX, rx=OUTPUT_UART_RX)
+    led = Pin(LED_PIN, Pin.OUT)
+    relais = Pin(RELAY_PIN, Pin.OUT)
+    sensor_uart.irq(handler=_on_rx, trigger=UART.IRQ_RXIDLE)
+    blink_tmr = Timer(-1)
+    return sensor_uart, pc_uart, led, relais
+
+# Ringbuffer voor meetwaarden (moving average) met lopende som
+_buf = array('H', [0] * MOVING_AVG_N)
+_buf_idx = 0
+_buf_count = 0
+_buf_sum = 0
 
 # ----------- STATUSMACHINE-DEFINITIES -----------
 class LevelState:
@@ -135,11 +210,32 @@ class LevelState:
     LOW = 1     # Laag water, LED knippert langzaam, relais aan
     BOTTOM = 2  # Zeer laag, LED knippert snel of blijft aan, relais uit (onveilig)
 
+# ----------- VASTE MELDINGEN (voorgecodeerd) -----------
+_MSG_SENSOR_TIMEOUT = b'Sensor timeout\n'
+_MSG_SENSOR_FOUT = b'Sensor fout\n'
+_MSG_PERM_ALARM = b'Permanent sensor alarm! (Relais op onveilig)\n'
+_MSG_RELAY_ON = b'Relais ingesteld op AAN (veilig)\n'
+_MSG_RELAY_OFF = b'Relais ingesteld op UIT (onveilig)\n'
+
+# Vooraf gealloceerde buffer voor de niveaumelding 'Waterniveau: <n> mm'; de
+# cijfers en staart worden in-place geschreven en per aantal cijfers is er een
+# vooraf gemaakte view, zodat er per meting geen nieuwe objecten ontstaan
+_LEVEL_PREFIX = b'Waterniveau: '
+_LEVEL_SUFFIX = b' mm\n'
+_LEVEL_MAX_DIGITS = 5  # Samples zijn 16-bit (array 'H'), dus max. 65535
+_LEVEL_LIMIT = 10 ** _LEVEL_MAX_DIGITS
+_LEVEL_START = len(_LEVEL_PREFIX)
+_level_msg = bytearray(_LEVEL_START + _LEVEL_MAX_DIGITS + len(_LEVEL_SUFFIX))
+_level_msg[:_LEVEL_START] = _LEVEL_PREFIX
+_level_views = tuple(memoryview(_level_msg)[:_LEVEL_START + n + len(_LEVEL_SUFFIX)]
+                     for n in range(_LEVEL_MAX_DIGITS + 1))
+
 # -------------- HULPFUNCTIES --------------
 def send_output(msg):
     """
     Stuur een status- of foutmelding naar de host-PC via UART1.
     Kan gebruikt worden voor logging/debugging.
+    Alleen voor dynamische teksten; vaste meldingen gaan via send_bytes.
     """
     pc_uart.write((msg + '\n').encode())
     try:
@@ -148,91 +244,241 @@ def send_output(msg):
     except Exception:
         pass  # BLE niet beschikbaar of niet geïnitialiseerd
 
-def read_distance():
+def send_bytes(b):
+    """
+    Stuur een vaste, reeds gecodeerde melding (inclusief newline) naar de
+    host-PC zonder nieuwe strings of bytes aan te maken. Alleen als BLE actief
+    is, wordt voor de notificatie nog een kopie zonder newline gemaakt.
+    """
+    pc_uart.write(b)
+    try:
+        if ble_status:
+            ble_status.notify_status(bytes(b[:-1]))
+    except Exception:
+        pass  # BLE niet beschikbaar of niet geïnitialiseerd
+
+def set_led(v):
+    """
+    Zet de LED alleen als de gewenste waarde afwijkt van de huidige
+    hardwarestatus; voorkomt overbodige GPIO-writes (zoals bij relais_actief).
+    """
+    global _led_hw
+    v = 1 if v else 0
+    if v != _led_hw:
+        led.value(v)
+        _led_hw = v
+
+def format_level(v):
+    """
+    Bouw de melding 'Waterniveau: <v> mm' (inclusief newline) in _level_msg en
+    retourneer de bijbehorende view, zonder nieuwe objecten aan te maken.
+    Waarden die niet in de buffer passen vallen terug op gewone formattering.
+    """
+    if v < 0 or v >= _LEVEL_LIMIT:
+        return b'Waterniveau: %d mm\n' % v
+    n = 1
+    t = v
+    while t >= 10:
+        t //= 10
+        n += 1
+    i = _LEVEL_START + n
+    for k in range(len(_LEVEL_SUFFIX)):
+        _level_msg[i + k] = _LEVEL_SUFFIX[k]
+    while True:
+        i -= 1
+        _level_msg[i] = 0x30 + v % 10
+        v //= 10
+        if i == _LEVEL_START:
+            break
+    return _level_views[n]
+
+def read_distance(budget_ms=SENSOR_TIMEOUT_MS):
     """
     Vraagt een meting aan de ultrasone sensor en leest het antwoord.
+    Wacht maximaal budget_ms op een antwoord.
     Retourneert de gemeten afstand in mm, of None bij een fout.
     Filtert onmogelijke waardes eruit.
     """
+    global _rx_ready
+    _rx_ready = False
     sensor_uart.write(TRIGGER_CMD)
     t_start = utime.ticks_ms()
-    while utime.ticks_diff(utime.ticks_ms(), t_start) < 300:
-        if sensor_uart.any() >= 4:
-            resp = sensor_uart.read(4)
-            # A02YY zendt 0xFF 0xFF <high byte> <low byte>
-            if resp and resp[0] == 0xFF and resp[1] == 0xFF:
-                distance = (resp[2] << 8) + resp[3]
-                min_mm = runtime_cfg["SENSOR_TO_WATER_MIN_MM"]
-                max_mm = runtime_cfg["TANK_HEIGHT_MM"]
-                if min_mm <= distance <= max_mm:
-                    return distance
-                else:
-                    send_output(f'Onwerkelijke waarde afstand: {distance}mm')
-                    return None
-    send_output('Sensor timeout')
+    while utime.ticks_diff(utime.ticks_ms(), t_start) < budget_ms:
+        if not _rx_ready:
+            idle()  # Slaap tot de volgende interrupt (UART-IRQ of systick)
+            continue
+        _rx_ready = False
+        # A02YY zendt 0xFF 0xFF <high byte> <low byte>
+        if _rx_buf[0] == 0xFF and _rx_buf[1] == 0xFF:
+            distance = (_rx_buf[2] << 8) + _rx_buf[3]
+            min_mm = runtime_cfg["SENSOR_TO_WATER_MIN_MM"]
+            max_mm = runtime_cfg["TANK_HEIGHT_MM"]
+            if min_mm <= distance <= max_mm:
+                return distance
+            else:
+                send_output(f'Onwerkelijke waarde afstand: {distance}mm')
+                return None
+    send_bytes(_MSG_SENSOR_TIMEOUT)
     return None
 
+def push_sample(v):
+    """
+    Voeg een meetwaarde toe aan de ringbuffer en werk de lopende som bij.
+    De oudste waarde wordt overschreven zodra de buffer vol is.
+    """
+    global _buf_sum, _buf_idx, _buf_count
+    _buf_sum += v - _buf[_buf_idx]
+    _buf[_buf_idx] = v
+    _buf_idx = (_buf_idx + 1) & _N_MASK
+    if _buf_count < MOVING_AVG_N:
+        _buf_count += 1
+
+@micropython.native
 def get_filtered_level():
     """
     Berekent het gemiddelde van de meest recente metingen.
     Dit onderdrukt pieken en ruis in de sensorwaarden.
     """
-    if not samples:
-        return None
-    return sum(samples) // len(samples)
-
-def update_alarm_logic(waterlevel, prev_state, led_status):
+    return _buf_sum // _buf_count if _buf_count else None
+
+# Debounce: een statuswissel wordt pas doorgevoerd als de nieuwe status bij
+# DEBOUNCE_SAMPLES opeenvolgende, nieuwe metingen gewenst is. De blinktimer
+# roept update_alarm_logic vaker aan dan er metingen binnenkomen; alleen een
+# gewijzigd volgnummer (sample_seq) telt daarom mee.
+DEBOUNCE_SAMPLES = 3
+_pending_state = None
+_pending_samples = 0
+_pending_seq = None
+
+# Per status een kleine stapfunctie die de gewenste volgende status bepaalt;
+# update_alarm_logic kiest de juiste via _STEPS[prev_state] i.p.v. een
+# if/elif-keten. Drempels komen uit _thr:
+# (slow_blink, fast_blink, crit_on, crit_off, bot_on, bot_off, measure_ms)
+@micropython.native
+def _step_ok(waterlevel):
+    if waterlevel <= _thr[2]:
+        return LevelState.LOW
+    return LevelState.OK
+
+@micropython.native
+def _step_low(waterlevel):
+    if waterlevel <= _thr[4]:
+        return LevelState.BOTTOM
+    if waterlevel >= _thr[3]:
+        return LevelState.OK
+    return LevelState.LOW
+
+@micropython.native
+def _step_bottom(waterlevel):
+    if waterlevel > _thr[5]:
+        return LevelState.LOW
+    return LevelState.BOTTOM
+
+# Volgorde moet overeenkomen met LevelState.OK, LOW, BOTTOM
+_STEPS = (_step_ok, _step_low, _step_bottom)
+
+@micropython.native
+def _hold(state, led_status):
+    # Uitvoer bij aanhouden van dezelfde status
+    if state == LevelState.LOW:
+        set_led(not led_status)
+        return LevelState.LOW, not led_status, _thr[0], 1
+    if state == LevelState.BOTTOM:
+        set_led(1)
+        return LevelState.BOTTOM, True, _thr[0], 0
+    set_led(0)
+    return LevelState.OK, False, _thr[0], 1
+
+@micropython.native
+def _enter(state):
+    # Uitvoer bij het binnengaan van een nieuwe status
+    set_led(0)
+    if state == LevelState.BOTTOM:
+        return LevelState.BOTTOM, False, _thr[1], 0
+    return state, False, _thr[0], 1
+
+@micropython.native
+def update_alarm_logic(waterlevel, prev_state, led_status, sample_seq):
     """
     De kern van de alarmlogica. Bepaalt aan de hand van het gefilterde waterniveau:
     - Welke status (OK/LOW/BOTTOM) actief is
     - Wat de LED moet doen (aan/uit/knipperen)
     - Welk relais-signaal gewenst is
-    Hysteresis voorkomt snel heen-en-weer schakelen rond een drempel.
+    Hysteresis voorkomt snel heen-en-weer schakelen rond een drempel; de
+    debounce (DEBOUNCE_SAMPLES) voorkomt dat één ruizige meting het relais laat
+    klepperen. sample_seq is het volgnummer van de meting achter waterlevel.
     Returns:
       nieuwe_status (LevelState),
       nieuwe_led_status (bool),
       nieuwe_blink_interval (int, ms),
       gewenste_relais_status (1=AAN, 0=UIT)
     """
-    slow_blink = runtime_cfg["SLOW_BLINK_MS"]
-    fast_blink = runtime_cfg["FAST_BLINK_MS"]
-    crit_on   = runtime_cfg["CRITICAL_LEVEL_ON_MM"]
-    crit_off  = runtime_cfg["CRITICAL_LEVEL_OFF_MM"]
-    bot_on    = runtime_cfg["BOTTOM_LEVEL_ON_MM"]
-    bot_off   = runtime_cfg["BOTTOM_LEVEL_OFF_MM"]
+    global _pending_state, _pending_samples, _pending_seq
 
     if waterlevel is None:
         # Geen actuele data: fail-safe (LED uit, relais aan)
-        led.value(0)
-        return prev_state, False, slow_blink, 1
-
-    if prev_state == LevelState.OK:
-        if waterlevel <= crit_on:
-            led.value(0)
-            return LevelState.LOW, False, slow_blink, 1
-        else:
-            led.value(0)
-            return LevelState.OK, False, slow_blink, 1
-    elif prev_state == LevelState.LOW:
-        if waterlevel <= bot_on:
-            led.value(0)
-            return LevelState.BOTTOM, False, fast_blink, 0
-        elif waterlevel >= crit_off:
-            led.value(0)
-            return LevelState.OK, False, slow_blink, 1
-        else:
-            led.value(not led_status)
-            return LevelState.LOW, not led_status, slow_blink, 1
-    elif prev_state == LevelState.BOTTOM:
-        if waterlevel > bot_off:
-            led.value(0)
-            return LevelState.LOW, False, slow_blink, 1
-        else:
-            led.value(1)
-            return LevelState.BOTTOM, True, slow_blink, 0
-    else:
-        led.value(0)
-        return LevelState.OK, False, slow_blink, 1
+        _pending_state = None
+        _pending_samples = 0
+        set_led(0)
+        return prev_state, False, _thr[0], 1
+
+    if not 0 <= prev_state < len(_STEPS):
+        # Onbekende status: terug naar OK
+        _pending_state = None
+        _pending_samples = 0
+        set_led(0)
+        return LevelState.OK, False, _thr[0], 1
+
+    next_state = _STEPS[prev_state](waterlevel)
+    if next_state == prev_state:
+        _pending_state = None
+        _pending_samples = 0
+        return _hold(prev_state, led_status)
+
+    if next_state != _pending_state:
+        _pending_state = next_state
+        _pending_samples = 1
+        _pending_seq = sample_seq
+    elif sample_seq != _pending_seq:
+        # Alleen een nieuwe meting telt; dezelfde meting opnieuw zien niet
+        _pending_samples += 1
+        _pending_seq = sample_seq
+    if _pending_samples < DEBOUNCE_SAMPLES:
+        return _hold(prev_state, led_status)
+
+    _pending_state = None
+    _pending_samples = 0
+    return _enter(next_state)
+
+# ----------- LED/RELAIS-LOGICA VIA TIMER -----------
+# De alarmlogica draait in een Timer-callback, zodat de hoofdlus alleen nog
+# metingen en config-controle hoeft te doen. De status hieronder wordt gedeeld
+# tussen de callback en de hoofdlus.
+level_state = LevelState.OK
+led_status = False
+blink_interval = runtime_cfg["SLOW_BLINK_MS"]
+last_valid_level = None
+sample_seq = 0        # Volgnummer van de laatste geldige meting (voor debounce)
+relais_actief = None  # Houdt bij of relais AAN of UIT was
+blink_tmr = None      # Wordt aangemaakt in _init_hardware
+
+def _blink_cb(t):
+    """
+    Timer-callback: werkt status/LED/relais bij en stelt de timer opnieuw in
+    als het blinkinterval wijzigt (door statuswissel of nieuwe config).
+    """
+    global level_state, led_status, blink_interval, relais_actief
+    level_state, led_status, interval, gewenste_relais = update_alarm_logic(
+        last_valid_level, level_state, led_status, sample_seq
+    )
+    # Schakel het relais alleen als de gewenste status verandert
+    if relais_actief != gewenste_relais:
+        relais.value(gewenste_relais)
+        relais_actief = gewenste_relais
+        send_bytes(_MSG_RELAY_ON if gewenste_relais else _MSG_RELAY_OFF)
+    if interval != blink_interval:
+        blink_interval = interval
+        blink_tmr.init(period=blink_interval, mode=Timer.PERIODIC, callback=_blink_cb)
 
 # -------------- HOOFDLUS --------------
 def main():
@@ -240,76 +486,102 @@ def main():
     De hoofdloop van het programma:
     - Meet periodiek het waterniveau
     - Filtert meetwaarden
-    - Werkt status/LED/Relais bij op basis van actuele parameters uit config
-    - Detecteert automatisch wijzigingen in config.json (via MD5-hash)
+    - Start de timer die status/LED/Relais bijwerkt op basis van actuele parameters uit config
+    - Detecteert automatisch wijzigingen in config.json (via os.stat)
       en past nieuwe waarden live toe op thresholds, blinktijden, etc.
     """
-    level_state = LevelState.OK
-    led_status = False
-    blink_interval = runtime_cfg["SLOW_BLINK_MS"]
-    last_blink = utime.ticks_ms()
-    last_measure = utime.ticks_ms()
-    last_valid_level = None
+    global last_valid_level, sample_seq, relais_actief
+    # Lokale namen voor veelgebruikte functies (sneller dan attribuut-lookup in de lus)
+    ticks_ms = utime.ticks_ms
+    ticks_diff = utime.ticks_diff
+    ticks_add = utime.ticks_add
+    sleep_ms = utime.sleep_ms
+
+    _init_hardware()
+    last_measure = ticks_ms()
     error_count = 0
-    relais_actief = None  # Houdt bij of relais AAN of UIT was
+    skip_measure = False  # Sla na aanhoudende sensorfouten één meetcyclus over
+    blink_tmr.init(period=blink_interval, mode=Timer.PERIODIC, callback=_blink_cb)
 
     # Voor config-wijzigingsdetectie
-    CONFIG_CHECK_INTERVAL_MS = 5000    # Hoe vaak config.json checken (ms)
-    last_cfg_hash = file_md5(CONFIG_FILE)
-    last_cfg_check = utime.ticks_ms()
+    last_cfg_stat = file_signature(CONFIG_FILE)
+    last_cfg_check = ticks_ms()
+    # Adaptief interval: verdubbelt bij geen wijziging, terug naar minimum bij wijziging
+    cfg_poll_ms = runtime_cfg["CONFIG_CHECK_INTERVAL_MS"]
 
-    while True:
-        now = utime.ticks_ms()
-
-        # ---- Config-herlaad: detecteer en verwerk aanpassingen in config.json ----
-        if utime.ticks_diff(now, last_cfg_check) >= CONFIG_CHECK_INTERVAL_MS:
-            cfg_hash = file_md5(CONFIG_FILE)
-            if cfg_hash and cfg_hash != last_cfg_hash:
-                try:
-                    with open(CONFIG_FILE) as f:
-                        new_cfg = ujson.load(f)
-                    changes = update_runtime_cfg(new_cfg)
-                    if changes:
-                        send_output("Config update: " + ", ".join(changes))
-                    last_cfg_hash = cfg_hash
-                except Exception as e:
-                    send_output("Fout bij herladen config: %s" % e)
-            last_cfg_check = now
-
-        # ---- Meet waterniveau en filter ----
-        if utime.ticks_diff(now, last_measure) >= runtime_cfg["MEASURE_INTERVAL_MS"]:
-            d = read_distance()
-            last_measure = now
-            if d is not None:
-                waterlevel = max(0, runtime_cfg["TANK_HEIGHT_MM"] - d)
-                samples.append(waterlevel)
-                filtered_level = get_filtered_level()
-                last_valid_level = filtered_level
-                send_output(f'Waterniveau: {filtered_level} mm')
-                error_count = 0
-            else:
-                error_count += 1
-                send_output('Sensor fout')
+    try:
+        while True:
+            now = ticks_ms()
+
+            # ---- Config-herlaad: detecteer en verwerk aanpassingen in config.json ----
+            if ticks_diff(now, last_cfg_check) >= cfg_poll_ms:
+                cfg_stat = file_signature(CONFIG_FILE)
+                if cfg_stat and cfg_stat != last_cfg_stat:
+                    try:
+                        with open(CONFIG_FILE) as f:
+                            new_cfg = ujson.load(f)
+                        changes = update_runtime_cfg(new_cfg)
+                        if changes:
+                            send_output("Config update: " + ", ".join(changes))
+                        last_cfg_stat = cfg_stat
+                    except Exception as e:
+                        send_output("Fout bij herladen config: %s" % e)
+                    cfg_poll_ms = runtime_cfg["CONFIG_CHECK_INTERVAL_MS"]
+                else:
+                    cfg_poll_ms = min(cfg_poll_ms * 2, runtime_cfg["CONFIG_CHECK_MAX_INTERVAL_MS"])
+                last_cfg_check = now
+
+            # ---- Meet waterniveau en filter ----
+            measure_ms = _thr[6]
+            if ticks_diff(now, last_measure) >= measure_ms:
+                last_measure = now
+                if skip_measure:
+                    # Na aanhoudende fouten één cyclus geen trigger naar de sensor
+                    skip_measure = False
+                else:
+                    # Bij herhaalde fouten korter wachten, zodat een losgekoppelde
+                    # sensor de hoofdlus niet telkens de volle wachttijd ophoudt
+                    budget_ms = SENSOR_TIMEOUT_MS if error_count < 2 else SENSOR_TIMEOUT_MIN_MS
+                    d = read_distance(budget_ms)
+                    if d is not None:
+                        waterlevel = max(0, runtime_cfg["TANK_HEIGHT_MM"] - d)
+                        push_sample(waterlevel)
+                        filtered_level = get_filtered_level()
+                        last_valid_level = filtered_level
+                        sample_seq += 1
+                        if runtime_cfg["LOG_VERBOSE"]:
+                            send_bytes(format_level(filtered_level))
+                        error_count = 0
+                    else:
+                        error_count += 1
+                        send_bytes(_MSG_SENSOR_FOUT)
+                        if error_count >= 5:
+                            skip_measure = True
+                # Permanent sensoralarm: elke meetcyclus opnieuw afdwingen, ook
+                # als de meting is overgeslagen (blink_tmr zet het relais anders
+                # terug op basis van het laatst bekende niveau)
                 if error_count >= 5:
-                    led.value(1)
+                    set_led(1)
                     if relais_actief != 0:
                         relais.value(0)  # Set relay to UNSAFE (OFF)
                         relais_actief = 0
-                        send_output('Permanent sensor alarm! (Relais op onveilig)')
-
-        # ---- LED/Relais-logica (kan sneller dan meetinterval) ----
-        if utime.ticks_diff(now, last_blink) >= blink_interval:
-            level_state, led_status, blink_interval, gewenste_relais = update_alarm_logic(
-                last_valid_level, level_state, led_status
-            )
-            # Schakel het relais alleen als de gewenste status verandert
-            if relais_actief != gewenste_relais:
-                relais.value(gewenste_relais)
-                relais_actief = gewenste_relais
-                send_output(f'Relais ingesteld op {"AAN (veilig)" if gewenste_relais else "UIT (onveilig)"}')
-            last_blink = now
-
-        utime.sleep_ms(30)  # Korte delay om CPU-belasting te verlagen
+                        send_bytes(_MSG_PERM_ALARM)
+
+            # Slaap tot de eerstvolgende deadline (meting of config-check);
+            # LED/relais worden tussendoor door blink_tmr bijgewerkt
+            now = ticks_ms()
+            next_wake = min(ticks_diff(ticks_add(last_measure, measure_ms), now),
+                            ticks_diff(ticks_add(last_cfg_check, cfg_poll_ms), now))
+            sleep_ms(max(1, next_wake))
+    finally:
+        # Hoofdlus gestopt (Ctrl-C of fout): timer en IRQ afbreken, zodat een
+        # dode regellus niet op basis van een bevroren niveau het relais blijft
+        # sturen, en relais/LED in de fail-safe alarmstand zetten
+        blink_tmr.deinit()
+        sensor_uart.irq(handler=None)
+        relais.value(0)  # Set relay to UNSAFE (OFF)
+        relais_actief = 0
+        set_led(1)
 
 # ----------- BLE STATUSRAPPORTAGE (Web Bluetooth) -----------
 # De onderstaande klasse WaterLevelBLE maakt het mogelijk om de status van het systeem
@@ -368,10 +640,10 @@ class WaterLevelBLE:
         for conn_handle in self.connections:
             self.ble.gatts_notify(conn_handle, self.status_handle, value)
 
-# Start het programma, BLE alleen als geconfigureerd
-if cfg.get("BLUETOOTH_ENABLED", True):
-    ble_status = WaterLevelBLE()
-else:
-    ble_status = None
+# Start het programma (alleen als script, niet bij import), BLE alleen als geconfigureerd
+ble_status = None
 
-main()
+if __name__ == "__main__":
+    if cfg.get("BLUETOOTH_ENABLED", True):
+        ble_status = WaterLevelBLE()
+    main()